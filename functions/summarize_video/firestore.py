@@ -14,18 +14,100 @@
 
 """Firestore Module to get and upload data from and to Firestore"""
 
+import logging
+import time
+
 from firebase_admin import firestore
 
 
+logger = logging.getLogger(__name__)
+
+
+# Video shots never change once a video is transcribed, so cache them per
+# process. Warm Cloud Functions instances then skip the Firestore read when
+# users iterate on prompts for the same video.
+_VIDEO_SHOTS_CACHE = {}
+_VIDEO_SHOTS_TTL_SECONDS = 900
+# How long a cached summarize result stays valid in the summary_cache
+# collection.
+_SUMMARY_CACHE_TTL_SECONDS = 86400
+
+
 def get_video_shots(file_name: str) -> list | None:
-  """Retrieves data on shot detection of the video file from Firestore."""
+  """Retrieves data on shot detection of the video file from Firestore.
+
+  Only the 'data' field is fetched; any other fields on the document never
+  leave Firestore, so they are neither downloaded nor deserialized.
+  """
   db = firestore.client()
-  doc = db.collection('video_shots').document(file_name).get()
+  doc = db.collection('video_shots').document(file_name).get(
+      field_paths=['data']
+  )
   if not doc.exists:
     return None
   return doc.to_dict().get('data')
 
 
+def get_video_shots_cached(file_name: str) -> list | None:
+  """Returns the video shots of the file, cached per process with a TTL.
+
+  Expired entries are evicted lazily on access. Lookups that found no video
+  shots are not cached so a video transcribed after the first call is still
+  picked up.
+  """
+  cached = _VIDEO_SHOTS_CACHE.get(file_name)
+  if cached is not None:
+    cached_at, video_shots = cached
+    if time.time() - cached_at < _VIDEO_SHOTS_TTL_SECONDS:
+      return video_shots
+    del _VIDEO_SHOTS_CACHE[file_name]
+  video_shots = get_video_shots(file_name)
+  if video_shots is not None:
+    _VIDEO_SHOTS_CACHE[file_name] = (time.time(), video_shots)
+  return video_shots
+
+
+def get_cached_summary(request_hash: str) -> dict | None:
+  """Returns the cached summarize result for an identical earlier request.
+
+  Args:
+    request_hash: A hash of the full request payload.
+
+  Returns:
+    The previously returned result, or None when there is no cache entry or
+    the entry is older than the TTL.
+  """
+  db = firestore.client()
+  doc = db.collection('summary_cache').document(request_hash).get()
+  if not doc.exists:
+    return None
+  data = doc.to_dict()
+  if time.time() - data.get('created_at', 0) >= _SUMMARY_CACHE_TTL_SECONDS:
+    return None
+  return data.get('result')
+
+
+def cache_summary(request_hash: str, result: dict) -> None:
+  """Stores the summarize result keyed by the request hash, best-effort.
+
+  The cached result embeds every segment with its words, which can exceed
+  Firestore's document size limit on long transcripts. A result that cannot
+  be written is logged and skipped instead of failing the request.
+
+  Args:
+    request_hash: A hash of the full request payload.
+    result: The result returned to the client.
+  """
+  db = firestore.client()
+  try:
+    db.collection('summary_cache').document(request_hash).set({
+        'result': result,
+        'created_at': time.time(),
+    })
+  except Exception as error:
+    logger.warning('Skipping summary cache write: %s', error)
+
+
 def upload_summary(full_text: str,
                    summary: str) -> None:
   """Uploads a summarized transcript to a Firestore's collection ("summary").
@@ -55,4 +137,36 @@ def upload_summary_transformation(video: str,
     "full_text": full_text,
     "summary": summary,
     "final_output": final_output,
-    })
\ No newline at end of file
+    })
+
+
+def upload_summary_batch(video: str,
+                         full_text: str,
+                         summary: str,
+                         final_output: str) -> None:
+  """Uploads the summary and its transformation in one batched write.
+
+  Both documents are committed atomically in a single network round trip
+  instead of one sequential write per collection.
+
+  Args:
+    video: The filename of the video.
+    full_text: The full transcript as transcribed by Speech-to-text
+      with optional editing from users in the UI.
+    summary: The "summarized" transcript that LLM returns.
+    final_output: The final text after matching the summary back to the
+      original transcript.
+  """
+  db = firestore.client()
+  batch = db.batch()
+  batch.set(db.collection('summary').document(),
+            {"full_text": full_text,
+             "summary": summary,
+             "summary_repr": repr(summary)})
+  batch.set(db.collection('summary_transformation').document(),
+            {"video": video,
+             "full_text": full_text,
+             "summary": summary,
+             "final_output": final_output,
+             })
+  batch.commit()
\ No newline at end of file
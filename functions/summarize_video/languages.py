@@ -12,16 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 import re
 
+
+logger = logging.getLogger(__name__)
+
+
 class Language:
   def get_clips_from_transcript(
       self,
       transcript_words: list,
       shortened_text: str,
-      input_transcript: list) -> list:
+      input_transcript: list,
+      word_index: list = None) -> list:
     pass
 
+  def build_word_index(self, transcript_words: list) -> list:
+    """Precomputes the lowercased text of each word in the transcript.
+
+    The matching in get_clips_from_transcript lowercases transcript words on
+    every comparison. The transcript does not change between retries, so
+    callers can build this index once and pass it to every call.
+
+    Args:
+      transcript_words: A list containing every word in the full transcript.
+
+    Return:
+      A list with the lowercased text of each word, index-aligned with
+      transcript_words.
+    """
+    return [word.get('text').lower() for word in transcript_words]
+
   def _extract_words_from_str(self, summary: str) -> list:
     """Extracts the words from the given summary splitting by space.
 
@@ -40,7 +62,8 @@ class Language:
 
     words = summary.split(' ')
     words = list(filter(lambda word: len(word) > 0, words))
-    print(f'words: {words}')
+    if logger.isEnabledFor(logging.DEBUG):
+      logger.debug('words: %s', words)
     return words
 
 class DefaultLanguage(Language):
@@ -51,7 +74,8 @@ class DefaultLanguage(Language):
       self,
       transcript_words: list,
       shortened_text: str,
-      input_transcript: list) -> list:
+      input_transcript: list,
+      word_index: list = None) -> list:
     """Identifies the clip from the summarized transcript. This function  minimizes the hallucination when LLM
     doesn't respect the original sentences from the full transcripts by adding  new words or only returning parts
     of the original sentences in its response.
@@ -63,15 +87,20 @@ class DefaultLanguage(Language):
     Args:
       transcript: The original full transcripts
       summary: The "summarized" transcript from LLM
+      word_index: An optional prebuilt index from build_word_index. Passing
+        it avoids re-lowercasing the transcript on every retry.
 
     Returns:
       A list containing the adjusted text, start_time, end_time, duration.
     """
-    print("----get_clips_from_transcript-----'")
-    print(transcript_words)
+    if logger.isEnabledFor(logging.DEBUG):
+      logger.debug('get_clips_from_transcript: %s', transcript_words)
+    if word_index is None:
+      word_index = self.build_word_index(transcript_words)
     transcript_ptr = 0
     output = []
 
+    # _extract_words_from_str already lowercases the whole summary.
     summary_words = super()._extract_words_from_str(shortened_text)
 
     word_ptr = 0
@@ -81,8 +110,7 @@ class DefaultLanguage(Language):
           word_idx >= len(summary_words)):
         return False
 
-      return (transcript_words[transcript_idx].get('text').lower() ==
-              summary_words[word_idx].lower())
+      return word_index[transcript_idx] == summary_words[word_idx]
 
     while transcript_ptr < len(transcript_words):
       transcript_builder = []
@@ -140,7 +168,8 @@ class Thai(Language):
       self,
       transcript_words: list,
       shortened_text: str,
-      input_transcript: list):
+      input_transcript: list,
+      word_index: list = None):
     """Matches the shortened text to the original transcript for getting
     video clips timestamps and duration.
 
@@ -90,5 +90,37 @@ class DefaultLanguageTest(unittest.TestCase):
                         "words": transcript1[6:]
                       }])
 
+  def test_get_clips_from_transcript_with_prebuilt_word_index(self):
+    test_default_language = DefaultLanguage()
+    transcript1 = [
+      {
+        "endTime": 1,
+        "startTime": 0,
+        "text": "Lorem",
+      },
+      {
+        "endTime": 2,
+        "startTime": 1,
+        "text": "Ipsum",
+      },
+      {
+        "endTime": 3,
+        "startTime": 2,
+        "text": "dolor",
+      },
+    ]
+    summary1 = 'lorem ipsum'
+    word_index1 = test_default_language.build_word_index(transcript1)
+
+    self.assertEqual(word_index1, ['lorem', 'ipsum', 'dolor'])
+    self.assertEqual(
+        test_default_language.get_clips_from_transcript(transcript1,
+                                                        summary1,
+                                                        [],
+                                                        word_index1),
+        test_default_language.get_clips_from_transcript(transcript1,
+                                                        summary1,
+                                                        []))
+
 if __name__ == '__main__':
     unittest.main()
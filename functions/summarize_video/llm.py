@@ -10,9 +10,42 @@
 # limitations under the License.
 """LLM Module to define LLM models, and generate prompts"""
 
+import hashlib
+import time
+
 from vertexai.preview.language_models import TextGenerationModel
 
 
+# Users re-running the same video re-issue identical prompts, so completed
+# responses are cached per process. Keys hash the model, temperature and the
+# full prompt; blocked responses are never cached.
+_RESPONSE_CACHE = {}
+_RESPONSE_CACHE_TTL_SECONDS = 900
+_RESPONSE_CACHE_MAX_ENTRIES = 64
+
+
+def _response_cache_key(text: str, model: str, temperature: float) -> str:
+  payload = f'{model}|{temperature}|{text}'
+  return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _response_cache_get(cache_key: str) -> str | None:
+  cached = _RESPONSE_CACHE.get(cache_key)
+  if cached is None:
+    return None
+  cached_at, response = cached
+  if time.time() - cached_at >= _RESPONSE_CACHE_TTL_SECONDS:
+    del _RESPONSE_CACHE[cache_key]
+    return None
+  return response
+
+
+def _response_cache_put(cache_key: str, response: str) -> None:
+  if len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX_ENTRIES:
+    _RESPONSE_CACHE.clear()
+  _RESPONSE_CACHE[cache_key] = (time.time(), response)
+
+
 def send_transcript_to_llm(text: str,
                            model: str = "text-bison@002",
                            temperature: float = 0.2,
@@ -34,6 +67,11 @@ def send_transcript_to_llm(text: str,
   Returns:
     A string of the summarized transcript.
   """
+  cache_key = _response_cache_key(text, model, temperature)
+  cached_response = _response_cache_get(cache_key)
+  if cached_response is not None:
+    return cached_response
+
   # AdClip uses the default value for parameters
   # https://cloud.google.com/vertex-ai/docs/generative-ai/model-reference/text
   # The best performing model for AdClip is currently "text-unicorn@001"
@@ -48,8 +86,99 @@ def send_transcript_to_llm(text: str,
     # "Transcript:" is used as part of the prompt, so this additional logic
     # removes the trailing string "Transcript:" in the response.
     if response.text.lstrip().startswith('Transcript:\n'):
-      return response.text.lstrip().replace('Transcript:\n', '', 1)
-    return response.text
+      response_text = response.text.lstrip().replace('Transcript:\n', '', 1)
+    else:
+      response_text = response.text
+    _response_cache_put(cache_key, response_text)
+    return response_text
+  else:
+    return "The response was blocked"
+
+
+def stream_transcript_to_llm(text: str,
+                             model: str = "text-bison@002",
+                             temperature: float = 0.2,
+                             max_output_tokens: int = 1024,
+                             top_k: int = 40,
+                             top_p: int = 0.8):
+  """Streams the LLM response chunk by chunk as it is generated.
+
+  This lets callers start processing partial output (e.g. matching clips and
+  accumulating duration) before the full response has finished generating,
+  and abandon the stream early to save tokens.
+
+  Args:
+    text: A prompt to generate the response from the model.
+    model: The Language Model to use.
+    temperature: A temperature indicates the degree of randomness in token
+      selection.
+    max_output_tokens: The maximum number of tokens that can be generated in the
+      response.
+    top_k: A value indicates how the model selects tokens for output.
+    top_p: A value indicates how the model selects tokens for output.
+
+  Yields:
+    The text of each response chunk. If a chunk is blocked, "The response
+    was blocked" is yielded and the stream ends.
+  """
+  model = TextGenerationModel.from_pretrained(model)
+  for response in model.predict_streaming(text,
+                                          temperature=temperature,
+                                          max_output_tokens=max_output_tokens,
+                                          top_k=top_k,
+                                          top_p=top_p,
+  ):
+    if response.is_blocked:  # Responsible AI
+      yield "The response was blocked"
+      return
+    yield response.text
+
+
+async def asend_transcript_to_llm(text: str,
+                                  model: str = "text-bison@002",
+                                  temperature: float = 0.2,
+                                  max_output_tokens: int = 1024,
+                                  top_k: int = 40,
+                                  top_p: int = 0.8) -> str:
+  """Sends a transcript to Vertex LLM without blocking the event loop.
+
+  This is the async counterpart of send_transcript_to_llm so several
+  candidate shortenings can be requested concurrently.
+
+  Args:
+    text: A prompt to generate the response from the model.
+    model: The Language Model to use.
+    temperature: A temperature indicates the degree of randomness in token
+      selection.
+    max_output_tokens: The maximum number of tokens that can be generated in the
+      response.
+    top_k: A value indicates how the model selects tokens for output.
+    top_p: A value indicates how the model selects tokens for output.
+
+  Returns:
+    A string of the summarized transcript.
+  """
+  cache_key = _response_cache_key(text, model, temperature)
+  cached_response = _response_cache_get(cache_key)
+  if cached_response is not None:
+    return cached_response
+
+  model = TextGenerationModel.from_pretrained(model)
+  response = await model.predict_async(text,
+                                       temperature=temperature,
+                                       max_output_tokens=max_output_tokens,
+                                       top_k=top_k,
+                                       top_p=top_p,
+  )
+  if not response.is_blocked:  # Responsible AI
+    # "Transcript:" is used as part of the prompt, so this additional logic
+    # removes the trailing string "Transcript:" in the response.
+    if response.text.lstrip().startswith('Transcript:\n'):
+      response_text = response.text.lstrip().replace('Transcript:\n', '', 1)
+    else:
+      response_text = response.text
+    _response_cache_put(cache_key, response_text)
+    return response_text
   else:
     return "The response was blocked"
 
@@ -27,15 +27,33 @@ from firebase_admin import initialize_app, firestore
 from languages import Language
 from languages import DefaultLanguage
 from languages import Thai
+import asyncio
+import bisect
+import hashlib
 import itertools
+import json
+import logging
 import firestore
 import llm
 
 
+logger = logging.getLogger(__name__)
+
+
 MAX_DURATION = float(40)
 MIN_DURATION = float(10)
 LANGUAGE_CODE = "en-US"
 MODEL_NAME = "text-unicorn@001"
+# Temperatures for the speculative retry candidates. Matches the range the
+# sequential retry loop used to walk through one call at a time.
+RETRY_TEMPERATURES = (0.4, 0.6, 0.8)
+# The language implementations are stateless, so one instance per process is
+# shared by every request instead of constructing one per invocation.
+_LANGUAGES = {
+    'th-TH': Thai(),
+    'en-US': DefaultLanguage(),
+}
+_DEFAULT_LANGUAGE = _LANGUAGES['en-US']
 
 
 initialize_app()
@@ -45,27 +63,46 @@ def calculate_duration(shortened_text: str,
                        transcript_words: list,
                        video_shots: list,
                        input_transcript: list,
-                       language: Language) -> float:
-  """Returns the total duration of all of the clips.
+                       language: Language,
+                       shot_end_times: list = None,
+                       word_start_times: list = None,
+                       word_end_times: list = None,
+                       word_index: list = None,
+                       clip_cache: dict = None) -> tuple[float, list]:
+  """Returns the total duration of all of the clips, and the clips.
 
   This function evaluates if the shortened video fulfills the duration
-  requirements from the users.
+  requirements from the users. Returning the clips alongside the duration
+  lets the caller keep the winning attempt's segments without recomputing
+  them. The optional timestamp arrays and word index can be built once by
+  the caller and reused across every retry; clip_cache memoizes the result
+  per shortened_text.
   """
-  total_duration = 0
+  if clip_cache is not None and shortened_text in clip_cache:
+    return clip_cache[shortened_text]
   clips = language.get_clips_from_transcript(
-      transcript_words, shortened_text, input_transcript
+      transcript_words, shortened_text, input_transcript, word_index
   )
-  clips = match_with_video_shots(video_shots, clips, transcript_words)
-  print('\\\\\\\\\calculate/////////')
-  print(clips)
-  for clip in clips:
-    total_duration += clip.get('duration')
-  return total_duration
+  clips, total_duration = match_with_video_shots(video_shots, clips,
+                                                 transcript_words,
+                                                 shot_end_times,
+                                                 word_start_times,
+                                                 word_end_times)
+  # The isEnabledFor guard skips formatting the clips repr entirely when
+  # DEBUG logging is off; this runs once per retry candidate.
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug('clips: %s', clips)
+  if clip_cache is not None:
+    clip_cache[shortened_text] = (total_duration, clips)
+  return total_duration, clips
 
 
 def match_with_video_shots(video_shots: list,
                            transcript: list,
-                           words: list) -> list:
+                           words: list,
+                           shot_end_times: list = None,
+                           word_start_times: list = None,
+                           word_end_times: list = None) -> tuple[list, float]:
   """Adjusts the startTime and endTime of each line in the transcript.
 
   This implementation helps with "jumpy" transition in the final output video.
@@ -76,50 +113,155 @@ def match_with_video_shots(video_shots: list,
     transcript: The full transcript transcribed by Speech to Text AI.
     words: A list containing the startTime and eachTime of each word in the full
     transcript.
+    shot_end_times: An optional sorted list of the end_time of each video shot.
+    word_start_times: An optional sorted list of the startTime of each word.
+    word_end_times: An optional sorted list of the endTime of each word.
 
   Returns:
-    The transcript with the adjusted startTime and endTime.
+    A tuple of the transcript with the adjusted startTime and endTime, and
+    the total duration of all of its lines. The duration is accumulated in
+    the same pass that adjusts the timestamps.
   """
+  # The timestamps are sorted, so each lookup binary-searches the arrays
+  # instead of walking the dicts word by word. The loop itself also runs on
+  # the flat float arrays and only touches the dicts to write the results
+  # back, keeping the per-line work free of repeated dict lookups.
+  if shot_end_times is None:
+    shot_end_times = [shot['end_time'] for shot in video_shots]
+  if word_start_times is None:
+    word_start_times = [word['startTime'] for word in words]
+  if word_end_times is None:
+    word_end_times = [word['endTime'] for word in words]
+  line_start_times = [line['startTime'] for line in transcript]
+  line_end_times = [line['endTime'] for line in transcript]
+  word_count = len(words)
+
   shot_index = 0
   word_index = 0
-  for index, line in enumerate(transcript):
-    while video_shots[shot_index]['end_time'] <= line['startTime']:
-      shot_index += 1
-    video_shot = video_shots[shot_index]
-
-    start_time = min(line['startTime'], video_shot['start_time'])
-    while (
-        word_index + 1 < len(words) - 1
-        and words[word_index + 1]['endTime'] < line['startTime']
-    ):
-      word_index += 1
-    previous_word = words[word_index]
-    if previous_word['startTime'] != line['startTime']:
-      start_time = max(previous_word['endTime'], start_time)
+  total_duration = 0
+  for index in range(len(transcript)):
+    line_start = line_start_times[index]
+    line_end = line_end_times[index]
+
+    shot_index = bisect.bisect_right(shot_end_times, line_start, shot_index)
+
+    start_time = min(line_start, video_shots[shot_index]['start_time'])
+    word_index = max(
+        word_index,
+        bisect.bisect_left(
+            word_end_times, line_start, word_index + 1, word_count - 1
+        ) - 1,
+    )
+    if word_start_times[word_index] != line_start:
+      start_time = max(word_end_times[word_index], start_time)
 
     transcript[index]['startTime'] = start_time
 
-    while video_shots[shot_index]['end_time'] < line['endTime']:
-      shot_index += 1
-    video_shot = video_shots[shot_index]
+    shot_index = bisect.bisect_left(shot_end_times, line_end, shot_index)
 
-    end_time = max(line['endTime'], video_shot['end_time'])
+    end_time = max(line_end, video_shots[shot_index]['end_time'])
 
-    while (
-        word_index < len(words) - 1
-        and words[word_index]['startTime'] < line['endTime']
-    ):
-      word_index += 1
-    next_word = words[word_index]
-    if next_word['endTime'] != line['endTime']:
-      end_time = min(end_time, next_word['startTime'])
+    word_index = min(
+        bisect.bisect_left(word_start_times, line_end, word_index),
+        word_count - 1,
+    )
+    if word_end_times[word_index] != line_end:
+      end_time = min(end_time, word_start_times[word_index])
 
     if index == len(transcript) - 1:
-      end_time = video_shots[-1]['end_time']
+      end_time = shot_end_times[-1]
 
     transcript[index]['endTime'] = end_time
     transcript[index]['duration'] = end_time - start_time
-  return transcript
+    total_duration += end_time - start_time
+  return transcript, total_duration
+
+
+async def retry_shortening(shortened_text: str,
+                           duration: float,
+                           clips: list,
+                           user_prompt: str,
+                           language_code: str,
+                           model_name: str,
+                           transcript_words: list,
+                           video_shots: list,
+                           input_transcript: list,
+                           language: Language,
+                           max_duration: float,
+                           min_duration: float,
+                           shot_end_times: list = None,
+                           word_start_times: list = None,
+                           word_end_times: list = None,
+                           word_index: list = None,
+                           clip_cache: dict = None) -> tuple[str, float, list]:
+  """Retries the shortening until the duration requirements are fulfilled.
+
+  Instead of re-querying the LLM one temperature at a time, all retry
+  candidates are requested concurrently and the first one whose duration
+  falls inside [min_duration, max_duration] wins. The remaining requests are
+  cancelled to avoid paying for tokens that are no longer needed. The
+  duration is recomputed for every candidate before it is considered, so a
+  candidate is never accepted (or the retry ended) on a stale duration. If
+  no candidate lands inside the bounds, the one whose duration is closest
+  to them is kept.
+
+  Args:
+    shortened_text: The shortened transcript from the first attempt.
+    duration: The duration of the first attempt.
+    clips: The clips of the first attempt.
+    user_prompt: The prompt that users may input on the UI.
+    language_code: The language code of the transcript.
+    model_name: The Language Model to use.
+    transcript_words: A list containing every word in the full transcript.
+    video_shots: The list containing video shots of the video file.
+    input_transcript: The full transcript from the client side.
+    language: The language of the transcript.
+    max_duration: The maximum duration requested by the users.
+    min_duration: The minimum duration requested by the users.
+
+  Returns:
+    A tuple of the best shortened transcript, its duration and its clips.
+  """
+  prompt = llm.make_prompt(
+      shortened_text, user_prompt, language_code=language_code
+  )
+  tasks = [
+      asyncio.create_task(llm.asend_transcript_to_llm(
+          text=prompt, model=model_name, temperature=temperature
+      ))
+      for temperature in RETRY_TEMPERATURES
+  ]
+  # How far a duration is from [min_duration, max_duration]; zero or
+  # negative means it is within the bounds.
+  def distance_from_bounds(candidate_duration: float) -> float:
+    return max(candidate_duration - max_duration,
+               min_duration - candidate_duration)
+
+  best_distance = distance_from_bounds(duration)
+  try:
+    for completed in asyncio.as_completed(tasks):
+      candidate = await completed
+      if candidate == 'The response was blocked':
+        continue
+      candidate_duration, candidate_clips = calculate_duration(
+          candidate, transcript_words, video_shots, input_transcript, language,
+          shot_end_times, word_start_times, word_end_times, word_index,
+          clip_cache
+      )
+      logger.debug('retry shortened_text: %s', candidate)
+      logger.debug('retry duration: %s', candidate_duration)
+      candidate_distance = distance_from_bounds(candidate_duration)
+      if candidate_distance < best_distance:
+        shortened_text = candidate
+        duration = candidate_duration
+        clips = candidate_clips
+        best_distance = candidate_distance
+      if candidate_distance <= 0:
+        break
+  finally:
+    for task in tasks:
+      task.cancel()
+  return shortened_text, duration, clips
 
 
 @https_fn.on_call()
@@ -144,6 +286,16 @@ def summarize_transcript(request: https_fn.CallableRequest) -> any:
   Returns:
     An object containing timestamp for segments of the summarized transcript.
   """
+  # Users frequently re-submit the exact same request while tweaking the UI.
+  # One Firestore read for an identical cached request replaces the whole
+  # pipeline, including every LLM call.
+  request_hash = hashlib.sha256(
+      json.dumps(request.data, sort_keys=True).encode('utf-8')
+  ).hexdigest()
+  cached_result = firestore.get_cached_summary(request_hash)
+  if cached_result is not None:
+    return cached_result
+
   # Input from client side (UI)
   input_transcript = request.data['transcript']
   user_prompt = request.data.get('prompt')
@@ -160,83 +312,110 @@ def summarize_transcript(request: https_fn.CallableRequest) -> any:
   except:
     min_duration = MIN_DURATION
 
-  if language_code == 'th-TH':
-    language = Thai()
-  else:
-    language = DefaultLanguage()
-
-  list_of_words = list(map(lambda line: line['words'], input_transcript))
-  transcript_words = list(itertools.chain.from_iterable(list_of_words))
-  video_shots = firestore.get_video_shots(filename)
-  print('===1===transcript_words===1=====')
-  print(transcript_words)
-
-  full_text = '\n'.join([x['text'] for x in input_transcript])
-  print('----full_text-----')
-  print(full_text)
-
-  # 1st attempt to shorten transcript.
-  shortened_text = llm.send_transcript_to_llm(
+  language = _LANGUAGES.get(language_code, _DEFAULT_LANGUAGE)
+
+  transcript_words = list(itertools.chain.from_iterable(
+      line['words'] for line in input_transcript
+  ))
+  video_shots = firestore.get_video_shots_cached(filename)
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug('transcript_words: %s', transcript_words)
+
+  # The timestamp arrays only depend on the video, so build them once and
+  # reuse them across every duration calculation of this request.
+  shot_end_times = [shot['end_time'] for shot in video_shots]
+  word_start_times = [word['startTime'] for word in transcript_words]
+  word_end_times = [word['endTime'] for word in transcript_words]
+  word_index = language.build_word_index(transcript_words)
+
+  full_text = '\n'.join(x['text'] for x in input_transcript)
+  logger.debug('full_text: %s', full_text)
+
+  # Memoizes (clips, duration) per shortened_text for the lifetime of this
+  # request so the winning attempt's clips are not recomputed afterwards.
+  clip_cache = {}
+
+  # 1st attempt to shorten transcript. The response is streamed so the
+  # duration can be checked on every completed line; once the clips of the
+  # accumulated text alone already exceed max_duration the stream is
+  # abandoned, saving the remaining generation tokens.
+  shortened_text = ''
+  checked_length = 0
+  for chunk in llm.stream_transcript_to_llm(
       text=llm.make_prompt(full_text, user_prompt, language_code=language_code),
       model=model_name, temperature=0.2
-  )
-
-  if shortened_text == 'The response was blocked':
-    return ValueError(
-        'The response was blocked due to potential violation of Responsible AI'
+  ):
+    if chunk == 'The response was blocked':
+      if not shortened_text:
+        return ValueError(
+            'The response was blocked due to potential violation of'
+            ' Responsible AI'
+        )
+      break
+    shortened_text += chunk
+    if '\n' not in shortened_text[checked_length:]:
+      continue
+    checked_length = len(shortened_text)
+    # The partial text is scored on the raw clip spans only. Matching
+    # against the video shots would extend the last clip to the end of the
+    # video and make a one-line prefix look as long as the whole video.
+    partial_clips = language.get_clips_from_transcript(
+        transcript_words, shortened_text, input_transcript, word_index
     )
+    if sum(clip['duration'] for clip in partial_clips) > max_duration:
+      break
+
+  # "Transcript:" is used as part of the prompt, so remove the trailing
+  # "Transcript:" from the accumulated response like the non-streaming path.
+  if shortened_text.lstrip().startswith('Transcript:\n'):
+    shortened_text = shortened_text.lstrip().replace('Transcript:\n', '', 1)
 
-  print('----shortened_text-----')
-  print(shortened_text)
+  logger.debug('shortened_text: %s', shortened_text)
 
-  duration = calculate_duration(
-      shortened_text, transcript_words, video_shots, input_transcript, language
+  duration, segments = calculate_duration(
+      shortened_text, transcript_words, video_shots, input_transcript, language,
+      shot_end_times, word_start_times, word_end_times, word_index, clip_cache
   )
-  print('----duration-----')
-  print(duration)
-
-  # Validate duration and start a loop if duration condition is not met.
-  # Keep the loop for maximum 3 times.
-  temperature = 0.2
-  while temperature <= 0.6 and (
-      duration > max_duration or duration < min_duration
-  ):
-    temperature += 0.2
-    shortened_text = llm.send_transcript_to_llm(
-        text=llm.make_prompt(
-            shortened_text, user_prompt, language_code=language_code
-        ),
-        model=model_name,
-        temperature=temperature,
-    )
-    duration = calculate_duration(
+  logger.debug('duration: %s', duration)
+
+  # Validate duration and retry if the duration condition is not met. The
+  # retry candidates run concurrently; the first one within bounds wins.
+  if duration > max_duration or duration < min_duration:
+    shortened_text, duration, segments = asyncio.run(retry_shortening(
         shortened_text,
+        duration,
+        segments,
+        user_prompt,
+        language_code,
+        model_name,
         transcript_words,
         video_shots,
         input_transcript,
         language,
-    )
-    print('----LOOP shortened_text-----')
-    print(shortened_text)
-    print('----duration-----')
-    print(duration)
-
-  segments = language.get_clips_from_transcript(
-      transcript_words, shortened_text, input_transcript
-  )
-  print('----segments-----')
-  print(segments)
-
-  segments = match_with_video_shots(video_shots, segments, transcript_words)
-  print('----segments + video shots-----')
-  print(segments)
-
-  output_text = '\n'.join(list(map(lambda line: line['text'], segments)))
-  firestore.upload_summary_transformation(filename,
-                                          full_text,
-                                          shortened_text,
-                                          output_text)
-
-  return  {
+        max_duration,
+        min_duration,
+        shot_end_times,
+        word_start_times,
+        word_end_times,
+        word_index,
+        clip_cache,
+    ))
+
+  # The winning attempt's clips were already computed (and matched with the
+  # video shots) by calculate_duration, so they are the final segments.
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug('segments + video shots: %s', segments)
+
+  output_text = '\n'.join(line['text'] for line in segments)
+  result = {
       'summarized_transcript': segments
   }
+  firestore.upload_summary_batch(filename,
+                                 full_text,
+                                 shortened_text,
+                                 output_text)
+  # Cached separately so an oversized cache document (long transcripts can
+  # exceed Firestore's per-document limit) never fails the summary batch.
+  firestore.cache_summary(request_hash, result)
+
+  return result
@@ -14,6 +14,8 @@
 
 """LLM Module to define LLM models, and generate prompts."""
 
+import asyncio
+
 from vertexai.preview.language_models import TextGenerationModel
 
 
@@ -107,6 +109,83 @@ def send_transcript_to_llm(
     return "The response was blocked"
 
 
+async def asend_transcript_to_llm(
+    text: str,
+    model_name: str,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    top_k: int = 40,
+    top_p: int = 0.8,
+) -> str:
+  """Sends a transcript to Vertex LLM without blocking the event loop.
+
+  This is the async counterpart of send_transcript_to_llm so independent
+  prompts can be awaited concurrently with asyncio.gather.
+
+  Args:
+    text: A prompt to generate the response from the model.
+    model_name: The Language Model to use.
+    temperature: A temperature indicates the degree of randomness in token
+      selection.
+    max_output_tokens: The maximum number of tokens that can be generated in the
+      response.
+    top_k: A value indicates how the model selects tokens for output.
+    top_p: A value indicates how the model selects tokens for output.
+
+  Returns:
+    A string of the summarized transcript.
+  """
+  model = TextGenerationModel.from_pretrained(model_name=model_name)
+  response = await model.predict_async(text,
+                                       temperature=temperature,
+                                       max_output_tokens=max_output_tokens,
+                                       top_k=top_k,
+                                       top_p=top_p,
+                                       )
+  if not response.is_blocked:  # Responsible AI
+    # "Transcript:" is used as part of the prompt, so this additional logic
+    # removes the trailing string "Transcript:" in the response.
+    if response.text.lstrip().startswith("Transcript:\n"):
+      return response.text.lstrip().replace("Transcript:\n", "", 1)
+    return response.text
+  else:
+    return "The response was blocked"
+
+
+def send_batch_to_llm(prompts: list[str],
+                      model_name: str,
+                      temperatures: list[float] | None = None) -> list[str]:
+  """Sends a batch of independent prompts to Vertex LLM in one call.
+
+  The text models in this SDK only expose online prediction (the batch
+  prediction API is an offline job backed by Cloud Storage/BigQuery), so the
+  batch is served by issuing all prompts concurrently and collecting the
+  responses. Callers get one round trip of wall-clock latency for the whole
+  batch instead of one per prompt.
+
+  Args:
+    prompts: The prompts to send. Responses are returned in the same order.
+    model_name: The Language Model to use.
+    temperatures: An optional per-prompt temperature. Defaults to 0.2 for
+      every prompt.
+
+  Returns:
+    A list of responses, index-aligned with the prompts.
+  """
+  if temperatures is None:
+    temperatures = [0.2] * len(prompts)
+
+  async def _gather() -> list[str]:
+    return await asyncio.gather(*[
+        asend_transcript_to_llm(
+            text=prompt, model_name=model_name, temperature=temperature
+        )
+        for prompt, temperature in zip(prompts, temperatures)
+    ])
+
+  return asyncio.run(_gather())
+
+
 def make_prompt_summarize(transcript: str,
                           user_prompt: str = "") -> str:
   user_prompt = f"{user_prompt if type(user_prompt) == "str" and len(user_prompt) > 0 else ""}"
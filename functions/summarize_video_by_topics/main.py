@@ -24,6 +24,7 @@ This function is the microservice to process the following tasks:
 """
 
 import itertools
+import logging
 import re
 
 from firebase_admin import firestore
@@ -32,6 +33,9 @@ from firebase_functions import https_fn
 import llm
 
 
+logger = logging.getLogger(__name__)
+
+
 LANGUAGE_CODE = "en-US"
 MODEL_NAME = "text-bison@002"
 TRANSCRIPT_PREFIX = "transcript:"
@@ -66,7 +70,7 @@ def match_with_video_shots(video_shots: list,
 
     start_time = min(line["startTime"], video_shot["start_time"])
     transcript[index]["startTime"] = start_time
-    print(f"start_time: {start_time}")
+    logger.debug("start_time: %s", start_time)
 
     while video_shots[shot_index]["end_time"] < line["endTime"]:
       shot_index += 1
@@ -85,16 +89,22 @@ def match_with_video_shots(video_shots: list,
           line["endTime"],
           min(video_shot["end_time"], words[word_index]["startTime"]),
       )
-    print(f"end_time: {end_time}")
+    logger.debug("end_time: %s", end_time)
     transcript[index]["endTime"] = end_time
     transcript[index]["duration"] = end_time - start_time
   return transcript
 
 
 def get_video_shots(file_name: str) -> bool | None:
-  """Retrieves data on shot detection of the video file from Firestore."""
+  """Retrieves data on shot detection of the video file from Firestore.
+
+  Only the "data" field is fetched; any other fields on the document never
+  leave Firestore, so they are neither downloaded nor deserialized.
+  """
   db = firestore.client()
-  doc = db.collection("video_shots").document(file_name).get()
+  doc = db.collection("video_shots").document(file_name).get(
+      field_paths=["data"]
+  )
   if not doc.exists:
     return None
   return doc.to_dict().get("data")
@@ -120,8 +130,8 @@ def get_clips_from_transcript(transcript: list,
     A list containing the adjusted text, start_time, end_time, duration
 
   """
-  print("----get_clips_from_transcript-----")
-  print(transcript)
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("get_clips_from_transcript: %s", transcript)
   index = 0
   transcript_ptr = 0
   output = []
@@ -134,7 +144,8 @@ def get_clips_from_transcript(transcript: list,
 
   words = summary.split(" ")
   words = list(filter(lambda word: len(word) > 0, words))
-  print(words)
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("words: %s", words)
 
   word_ptr = 0
 
@@ -223,8 +234,9 @@ def fix_timestamps(
         shortened_list.append(line)
 
   shortened_list = sort_transcript(shortened_list)
-  list_of_words = list(map(lambda line: line["words"], input_transcript))
-  transcript_words = list(itertools.chain.from_iterable(list_of_words))
+  transcript_words = list(itertools.chain.from_iterable(
+      line["words"] for line in input_transcript
+  ))
 
   shot_index = 0
   word_ptr = 0
@@ -238,8 +250,9 @@ def fix_timestamps(
       return False
 
     word_count = len(line_text.split(" "))
-    list_of_text = list(map(lambda line: line["text"], transcript_words))
-    return line_text == " ".join(list_of_text[word_idx : word_idx + word_count])
+    return line_text == " ".join(
+        word["text"] for word in transcript_words[word_idx : word_idx + word_count]
+    )
 
   corrected_lines = {}
   for line in shortened_list:
@@ -298,11 +311,12 @@ def fix_timestamps(
           "text": line["text"],
       }
 
-  print("corrected_lines")
-  for line_number in corrected_lines:
-    line = corrected_lines[line_number]
-    print(f"{line["startTime"]} - {line["endTime"]}")
-    print(line["text"])
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("corrected_lines")
+    for line_number in corrected_lines:
+      line = corrected_lines[line_number]
+      logger.debug("%s - %s", line["startTime"], line["endTime"])
+      logger.debug("%s", line["text"])
 
   for topic in text_sorted_by_topics:
     for line_number in text_sorted_by_topics[topic]:
@@ -316,6 +330,48 @@ def fix_timestamps(
   return text_sorted_by_topics
 
 
+def shorten_transcript(full_text: str,
+                       user_prompt: str,
+                       model_name: str) -> tuple[str, str]:
+  """Runs the LLM prompts to shorten the transcript by topics.
+
+  The bullet-point summary and the branding sentences have no data dependency
+  on each other, so both prompts go to the LLM as one batch. Only the final
+  prompt, which matches sentences to the bullet points, has to wait for the
+  summary and is sent on its own.
+
+  Args:
+    full_text: The full transcript with the "Line {number}:" prefixes.
+    user_prompt: The prompt that users may input on the UI.
+    model_name: The Language Model to use.
+
+  Returns:
+    A tuple of (summary_in_bullets, match_sentences_to_bullet_points) where
+    the matched sentences already include the branding sentences.
+  """
+  summary_in_bullets, branding_sentences = llm.send_batch_to_llm(
+      prompts=[
+          llm.make_prompt_summarize(full_text, user_prompt),
+          llm.keep_branding_sentences(full_text),
+      ],
+      model_name=model_name,
+      temperatures=[0.2, 0.1],
+  )
+  summary_in_bullets = summary_in_bullets.strip(" ")
+  branding_sentences = branding_sentences.strip()
+  logger.debug("summary_in_bullets: %s", summary_in_bullets)
+  logger.debug("branding_sentences: %s", branding_sentences)
+
+  match_sentences_to_bullet_points = llm.send_transcript_to_llm(
+      text=llm.make_prompt_match_sentence_to_bullet_points(
+          full_text, summary_in_bullets
+      ), model_name=model_name
+  ).strip()
+
+  match_sentences_to_bullet_points += "\n" + "\n" + branding_sentences
+  return summary_in_bullets, match_sentences_to_bullet_points
+
+
 @https_fn.on_call()
 def summarize_transcript_by_topic(request: https_fn.CallableRequest) -> any:
   """Receives input from a HTTP request and processes data.
@@ -344,55 +400,37 @@ def summarize_transcript_by_topic(request: https_fn.CallableRequest) -> any:
   model_name = request.data.get("model_name") or MODEL_NAME
   language_code = request.data.get("language_code") or LANGUAGE_CODE
 
-  full_text = "\n".join([
+  full_text = "\n".join(
       f"Line {counter}: {x["text"]}"
       for counter, x in enumerate(input_transcript)
-  ])
-  print("----full_text-----")
-  print(full_text)
+  )
+  logger.debug("full_text: %s", full_text)
 
-  list_of_words = list(map(lambda line: line["words"], input_transcript))
-  transcript_words = list(itertools.chain.from_iterable(list_of_words))
+  transcript_words = list(itertools.chain.from_iterable(
+      line["words"] for line in input_transcript
+  ))
 
   video_shots = get_video_shots(filename)
-  print("=====video_shots======")
-  print(video_shots)
-
-  summary_in_bullets = llm.send_transcript_to_llm(
-      text=llm.make_prompt_summarize(full_text, user_prompt),
-      model_name=model_name
-  ).strip(" ")
-  print("----main-ideas-in-bullet-----")
-  print(summary_in_bullets)
-
-  branding_sentences = llm.send_transcript_to_llm(
-      text=llm.keep_branding_sentences(full_text), temperature=0.1,
-      model_name=model_name
-  ).strip()
-  print("----branding_sentences-----")
-  print(branding_sentences)
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("video_shots: %s", video_shots)
 
-  match_sentences_to_bullet_points = llm.send_transcript_to_llm(
-      text=llm.make_prompt_match_sentence_to_bullet_points(
-          full_text, summary_in_bullets
-      ), model_name=model_name
-  ).strip()
-
-  match_sentences_to_bullet_points += "\n" + "\n" + branding_sentences
-  print("----match_sentences_to_bullet_points-----")
-  print(match_sentences_to_bullet_points)
+  summary_in_bullets, match_sentences_to_bullet_points = shorten_transcript(
+      full_text, user_prompt, model_name
+  )
+  logger.debug("match_sentences_to_bullet_points: %s",
+               match_sentences_to_bullet_points)
 
   text_sorted_by_topics = llm.transform_sentences_to_dict(
       match_sentences_to_bullet_points, transcript=input_transcript
   )
-  print("----text_sorted_by_topics-----")
-  print(text_sorted_by_topics)
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("text_sorted_by_topics: %s", text_sorted_by_topics)
 
   fixed_topics = fix_timestamps(
       video_shots, text_sorted_by_topics, input_transcript
   )
 
-  print("----fixed_timestamps-----")
-  print(fixed_topics)
+  if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("fixed_timestamps: %s", fixed_topics)
 
   return fixed_topics